@@ -1,29 +1,65 @@
 #!/usr/bin/env -S uv run
 # /// script
-# dependencies = ["typer>=0.9.0"]
+# dependencies = ["typer>=0.9.0", "blake3>=0.4"]
 # ///
 """
 Move all files from one or more source directories into a single target directory.
 
 Recursively scans subdirectories and flattens the structure.
-Handles filename collisions by appending a numeric suffix (e.g., photo_1.jpg).
-Supports cross-filesystem moves (copy + delete with verification).
+Handles filename collisions by appending a suffix (e.g., photo_1.jpg, then a
+short hash of the source path such as photo_3f9a0c1e.jpg).
+Supports cross-filesystem moves (copy + delete, with optional checksum verification).
 """
 
 import errno
 import hashlib
+import os
 import shutil
 import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from pathlib import Path
 
 import typer
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 app = typer.Typer(
     help="Consolidate files from multiple directories into one.",
     add_completion=False,
 )
 
-claimed_names: set[str] = set()
+DIGEST_NAME = "BLAKE3" if blake3 else "SHA256"
+HASH_CHUNK_SIZE = 1 << 20
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Linux ioctl to share extents between files (btrfs/XFS reflinks)
+FICLONE = 0x40049409
+COPY_RANGE_CHUNK = 1 << 30
+# Errors meaning "this filesystem/kernel can't do it", not "the copy failed"
+KERNEL_COPY_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+}
 
 
 def check_path_overlap(target_dir: Path, source_dirs: list[Path]) -> None:
@@ -58,76 +94,338 @@ def is_subpath(child: Path, parent: Path) -> bool:
         return False
 
 
-def get_all_files(directory: Path) -> list[Path]:
-    """Recursively get all regular files in a directory."""
-    files = []
+def warn(error: OSError, under: Path | None = None) -> None:
+    """Report a directory that could not be read and keep going."""
+    where = f" (under {under})" if under is not None else ""
+    print(f"Warning: {error}{where}", file=sys.stderr)
+
+
+def get_all_files(directory: Path) -> Iterator[Path]:
+    """Yield all regular files under a directory."""
+    try:
+        top_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError as e:
+        warn(e)
+        return
+
+    # Each level keeps its dir fd and the subdirectories left to visit, so
+    # children open relative to their parent's fd (like os.fwalk) with at most
+    # one fd per level of depth, and every directory is listed exactly once.
+    stack: list[tuple[Path, int, list[str]]] = []
+    dirpath, fd = directory, top_fd
+    try:
+        while True:
+            subdirs: list[str] = []
+            stack.append((dirpath, fd, subdirs))
+            try:
+                with os.scandir(fd) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.name)
+                            elif entry.is_file(follow_symlinks=False):
+                                yield dirpath / entry.name
+                        except OSError as e:
+                            warn(e, under=dirpath)
+            except OSError as e:
+                warn(e, under=dirpath)
+
+            while stack:
+                parent, parent_fd, pending = stack[-1]
+                if not pending:
+                    os.close(parent_fd)
+                    stack.pop()
+                    continue
+                name = pending.pop()
+                # Skip directories we can't list and enter, as the old iterdir
+                # walk did, rather than failing later on every file inside
+                if not os.access(name, os.R_OK | os.X_OK, dir_fd=parent_fd):
+                    error = PermissionError(
+                        errno.EACCES, os.strerror(errno.EACCES), name
+                    )
+                    warn(error, under=parent)
+                    continue
+                try:
+                    fd = os.open(
+                        name,
+                        os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW,
+                        dir_fd=parent_fd,
+                    )
+                except OSError as e:
+                    warn(e, under=parent)
+                    continue
+                dirpath = parent / name
+                break
+            else:
+                return
+    finally:
+        for _, open_fd, _ in stack:
+            os.close(open_fd)
+
+
+def is_case_insensitive(directory: Path, probe: bool = True) -> bool:
+    """Check whether directory is on a case-insensitive filesystem (vfat, exFAT).
+
+    If no existing name can be compared, a scratch file is created and removed
+    to find out; pass probe=False (e.g. for dry runs) to assume case-sensitive.
+    """
+    if not directory.exists():
+        return False
+
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                swapped = entry.name.swapcase()
+                if swapped == entry.name or swapped.swapcase() != entry.name:
+                    continue
+                try:
+                    other = os.stat(directory / swapped, follow_symlinks=False)
+                except FileNotFoundError:
+                    return False
+                return os.path.samestat(entry.stat(follow_symlinks=False), other)
+    except OSError:
+        return False
+
+    if not probe:
+        return False
+
+    # Nothing with letters in its name to compare, so probe with a scratch file
     try:
-        for entry in directory.iterdir():
-            if entry.is_dir():
-                files.extend(get_all_files(entry))
-            elif entry.is_file():
-                files.append(entry)
-    except PermissionError as e:
-        print(f"Warning: {e}", file=sys.stderr)
-    return files
-
-
-def get_unique_name(target_dir: Path, filename: str) -> Path:
-    """Get a unique filename in target_dir, handling collisions."""
-    stem = Path(filename).stem
-    suffix = Path(filename).suffix
-    candidate = target_dir / filename
-    counter = 1
-
-    while candidate.exists() or str(candidate) in claimed_names:
-        candidate = target_dir / f"{stem}_{counter}{suffix}"
+        fd, probe_path = tempfile.mkstemp(prefix=".case-probe-", dir=directory)
+    except OSError:
+        return False
+    os.close(fd)
+    try:
+        return os.path.exists(os.path.join(directory, Path(probe_path).name.upper()))
+    finally:
+        os.unlink(probe_path)
+
+
+def get_unique_name(
+    target_dir: Path,
+    filepath: Path,
+    claimed_names: set[str],
+    case_insensitive: bool = False,
+) -> Path:
+    """Get a unique filename in target_dir for filepath, handling collisions.
+
+    The first collision gets a _1 suffix. Past that, a short hash of the source
+    path almost always lands on a free name in one probe, so heavily duplicated
+    names don't walk _2, _3, ... one by one; the counter is only a last resort.
+
+    claimed_names must already hold every name present in target_dir, casefolded
+    when case_insensitive is set.
+    """
+    key = str.casefold if case_insensitive else str
+    stem = filepath.stem
+    suffix = filepath.suffix
+    candidate = filepath.name
+
+    if key(candidate) in claimed_names:
+        candidate = f"{stem}_1{suffix}"
+    if key(candidate) in claimed_names:
+        # Resolved so the name doesn't depend on how the source was typed
+        source = os.fsencode(filepath.resolve())
+        digest = hashlib.blake2b(source, digest_size=4).hexdigest()
+        candidate = f"{stem}_{digest}{suffix}"
+
+    counter = 2
+    while key(candidate) in claimed_names:
+        candidate = f"{stem}_{counter}{suffix}"
         counter += 1
 
-    claimed_names.add(str(candidate))
-    return candidate
+    claimed_names.add(key(candidate))
+    return target_dir / candidate
+
+
+def plan_moves(
+    target_dir: Path,
+    source_dirs: list[Path],
+    claimed_names: set[str],
+    case_insensitive: bool = False,
+) -> Iterator[tuple[Path, Path, bool]]:
+    """Yield (source, destination, renamed) for each file, resolving names lazily."""
+    for source_dir in source_dirs:
+        if not source_dir.exists():
+            print(f"Skipping {source_dir}: not found or not accessible")
+            continue
+
+        for filepath in get_all_files(source_dir):
+            simple_dest = target_dir / filepath.name
+            final_dest = get_unique_name(
+                target_dir, filepath, claimed_names, case_insensitive
+            )
+            yield filepath, final_dest, final_dest != simple_dest
+
+
+def compute_digest(filepath: Path) -> str:
+    """Compute a file checksum, preferring BLAKE3 and falling back to SHA256."""
+    buf = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(filepath, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if blake3:
+            if os.fstat(f.fileno()).st_size > HASH_CHUNK_SIZE:
+                hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+            else:
+                hasher = blake3.blake3()
+        else:
+            hasher = hashlib.sha256()
+        while n := f.readinto(buf):
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def kernel_copy(src: Path, dest: Path) -> None:
+    """Copy file data without user-space buffering, as a reflink if possible."""
+    with open(src, "rb") as fsrc, open(dest, "xb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return
+        except OSError as e:
+            if e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+
+        while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_RANGE_CHUNK):
+            pass
+
+        # Some filesystems and kernels return 0 straight away without copying
+        # anything. Treat a short copy as unsupported so copy_file falls back.
+        src_size = os.fstat(fsrc.fileno()).st_size
+        dest_size = os.fstat(fdst.fileno()).st_size
+        if src_size != dest_size:
+            raise OSError(
+                errno.ENOTSUP,
+                f"copy_file_range copied {dest_size} of {src_size} bytes",
+                str(src),
+            )
+
 
+def copy_file(src: Path, dest: Path) -> None:
+    """Copy a file and its metadata, preferring in-kernel copies."""
+    if fcntl and hasattr(os, "copy_file_range"):
+        try:
+            kernel_copy(src, dest)
+        except OSError as e:
+            if e.errno == errno.EEXIST:
+                raise
+            dest.unlink(missing_ok=True)
+            if e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+        else:
+            shutil.copystat(src, dest)
+            return
 
-def compute_sha256(filepath: Path) -> str:
-    """Compute SHA256 checksum of a file."""
-    sha256 = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    shutil.copy2(src, dest)
 
 
-def move_file(src: Path, dest: Path, verify: bool) -> None:
-    """Move a file, handling cross-filesystem moves."""
-    if dest.exists():
+def move_file(src: Path, dest: Path, verify: bool, target_fd: int) -> str | None:
+    """Move a file, handling cross-filesystem moves.
+
+    target_fd is an open descriptor for dest's directory; dest is looked up
+    relative to it rather than resolved from the root on every call.
+    Returns the verified checksum when a copy was verified, else None.
+    """
+    try:
+        os.stat(dest.name, dir_fd=target_fd, follow_symlinks=False)
+    except FileNotFoundError:
+        pass
+    else:
         raise FileExistsError(f"destination file already exists (no-clobber): {dest}")
 
     src_checksum = None
     if verify:
-        src_checksum = compute_sha256(src)
+        src_checksum = compute_digest(src)
 
     try:
-        src.rename(dest)
-        return
+        os.rename(src, dest.name, dst_dir_fd=target_fd)
+        return None
     except OSError as e:
         if e.errno != errno.EXDEV:
             raise
 
-    shutil.copy2(src, dest)
-
-    if src.stat().st_size != dest.stat().st_size:
-        dest.unlink()
-        raise RuntimeError(f"copy verification failed: size mismatch for {src}")
+    copy_file(src, dest)
 
     if verify:
-        dest_checksum = compute_sha256(dest)
+        dest_checksum = compute_digest(dest)
         if src_checksum != dest_checksum:
             dest.unlink()
             raise RuntimeError(
                 f"checksum verification failed for {src}: source={src_checksum} dest={dest_checksum}"
             )
-        print(f"  [verified] SHA256: {src_checksum}")
 
     src.unlink()
+    return src_checksum
+
+
+def execute_moves(
+    moves: Iterable[tuple[Path, Path, bool]], verify: bool, target_fd: int
+) -> tuple[int, int]:
+    """Run planned moves on a thread pool, returning (moved, renamed) counts."""
+    completed = 0
+    renamed_count = 0
+    failure: tuple[Path, Path, Exception] | None = None
+    pending: dict[Future[str | None], tuple[Path, Path, bool]] = {}
+
+    def collect(futures: Iterable[Future[str | None]]) -> None:
+        nonlocal completed, renamed_count, failure
+        for future in futures:
+            src, dest, renamed = pending.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                checksum = future.result()
+            except Exception as e:
+                if failure is None:
+                    failure = (src, dest, e)
+                continue
+
+            suffix = " (renamed)" if renamed else ""
+            print(f"Moved: {src} -> {dest}{suffix}")
+            # Printed here, not in the worker, so it stays under its own file
+            if checksum:
+                print(f"  [verified] {DIGEST_NAME}: {checksum}")
+            completed += 1
+            if renamed:
+                renamed_count += 1
+
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    finished = False
+    try:
+        for src, dest, renamed in moves:
+            future = pool.submit(move_file, src, dest, verify, target_fd)
+            pending[future] = (src, dest, renamed)
+            # Bound in-flight work so planning doesn't race ahead of the moves
+            if len(pending) >= MAX_WORKERS * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                if failure:
+                    break
+
+        if failure:
+            for future in pending:
+                future.cancel()
+        collect(as_completed(list(pending)))
+        finished = True
+    finally:
+        if finished:
+            pool.shutdown()
+        else:
+            # Interrupted, or planning raised: drop queued moves as the
+            # sequential loop would have, and report the ones that did finish
+            pool.shutdown(cancel_futures=True)
+            collect(list(pending))
+
+    if failure:
+        src, dest, e = failure
+        print(f"\nFAILED: {src} -> {dest}", file=sys.stderr)
+        print(f"Error: {e}", file=sys.stderr)
+        print(f"\nStopping. {completed} files moved successfully.", file=sys.stderr)
+        print("Re-run the script to continue with remaining files.", file=sys.stderr)
+        raise typer.Exit(1)
+
+    return completed, renamed_count
 
 
 @app.command()
@@ -140,7 +438,9 @@ def main(
         False, "--dry-run", "-n", help="Preview changes without moving any files"
     ),
     verify: bool = typer.Option(
-        False, "--verify", help="Verify SHA256 checksums after copy (slower but safer)"
+        False,
+        "--verify",
+        help="Verify checksums after copy (BLAKE3 if installed, else SHA256)",
     ),
 ) -> None:
     """
@@ -148,78 +448,57 @@ def main(
 
     Recursively scans all source directories and moves files into the target,
     flattening the directory structure. Handles filename collisions by appending
-    a numeric suffix (e.g., photo.jpg becomes photo_1.jpg).
+    a suffix (e.g., photo.jpg becomes photo_1.jpg; further duplicates get a
+    short hash of their source path instead).
     """
     if not source_dirs:
         raise typer.BadParameter("at least one source directory is required")
 
     check_path_overlap(target_dir, source_dirs)
 
-    if target_dir.exists():
-        for entry in target_dir.iterdir():
-            claimed_names.add(str(target_dir / entry.name))
-
     if dry_run:
         print("DRY RUN - no files will be moved\n")
     else:
         target_dir.mkdir(parents=True, exist_ok=True)
 
-    operations: list[tuple[Path, Path, bool]] = []
+    # On vfat/exFAT targets IMG.jpg and img.JPG are the same file
+    case_insensitive = is_case_insensitive(target_dir, probe=not dry_run)
+    key = str.casefold if case_insensitive else str
 
-    for source_dir in source_dirs:
-        if not source_dir.exists():
-            print(f"Skipping {source_dir}: not found or not accessible")
-            continue
-
-        files = get_all_files(source_dir)
-        for filepath in files:
-            simple_dest = target_dir / filepath.name
-            final_dest = get_unique_name(target_dir, filepath.name)
-            was_renamed = final_dest != simple_dest
-            operations.append((filepath, final_dest, was_renamed))
+    claimed_names: set[str] = set()
+    if target_dir.exists():
+        with os.scandir(target_dir) as it:
+            claimed_names.update(key(entry.name) for entry in it)
 
-    if not operations:
-        print("No files found to move.")
-        raise typer.Exit(0)
+    if verify and not dry_run:
+        print(f"Checksum verification enabled ({DIGEST_NAME})")
 
-    renamed_count = sum(1 for _, _, renamed in operations if renamed)
+    moves = plan_moves(target_dir, source_dirs, claimed_names, case_insensitive)
 
     if dry_run:
-        for src, dest, renamed in operations:
+        completed = 0
+        renamed_count = 0
+        for src, dest, renamed in moves:
             suffix = " (renamed)" if renamed else ""
             print(f"Would move: {src} -> {dest}{suffix}")
-        plural = "s" if len(operations) != 1 else ""
-        print(
-            f"\n{len(operations)} file{plural} would be moved ({renamed_count} renamed to avoid duplicates)"
-        )
-        raise typer.Exit(0)
-
-    if verify:
-        print("Checksum verification enabled (SHA256)")
-
-    completed = 0
-    for src, dest, renamed in operations:
+            completed += 1
+            if renamed:
+                renamed_count += 1
+    else:
+        target_fd = os.open(target_dir, os.O_RDONLY | os.O_DIRECTORY)
         try:
-            move_file(src, dest, verify)
-        except Exception as e:
-            print(f"\nFAILED: {src} -> {dest}", file=sys.stderr)
-            print(f"Error: {e}", file=sys.stderr)
-            print(
-                f"\nStopping. {completed}/{len(operations)} files moved successfully.",
-                file=sys.stderr,
-            )
-            print(
-                "Re-run the script to continue with remaining files.", file=sys.stderr
-            )
-            raise typer.Exit(1)
+            completed, renamed_count = execute_moves(moves, verify, target_fd)
+        finally:
+            os.close(target_fd)
 
-        suffix = " (renamed)" if renamed else ""
-        print(f"Moved: {src} -> {dest}{suffix}")
-        completed += 1
+    if completed == 0:
+        print("No files found to move.")
+        raise typer.Exit(0)
 
     plural = "s" if completed != 1 else ""
+    action = "would be moved" if dry_run else "moved"
     print(
-        f"\n{completed} file{plural} moved ({renamed_count} renamed to avoid duplicates)"
+        f"\n{completed} file{plural} {action} ({renamed_count} renamed to avoid duplicates)"
     )
 
 
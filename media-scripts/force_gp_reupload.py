@@ -8,48 +8,123 @@ Requires: exiftool (pacman -S perl-image-exiftool)
 """
 
 from pathlib import Path
+from typing import IO
+import os
 import subprocess
 import shutil
+import tempfile
 import typer
 
 app = typer.Typer(add_completion=False)
 
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".heic", ".mov", ".mp4", ".png"}
+READY = "{ready}"
 
 
 def check_exiftool() -> bool:
     return shutil.which("exiftool") is not None
 
 
-def add_comment(path: Path, comment: str) -> bool:
-    """Add comment to media file using exiftool."""
+def start_exiftool() -> subprocess.Popen:
+    """Start one long-lived exiftool that reads commands from stdin (-stay_open)."""
+    return subprocess.Popen(
+        ["exiftool", "-stay_open", "True", "-@", "-"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def stop_exiftool(exiftool: subprocess.Popen) -> None:
+    try:
+        exiftool.stdin.write("-stay_open\nFalse\n")
+        exiftool.stdin.close()
+    except OSError:
+        pass
+    exiftool.wait()
+
+
+def read_until_ready(stream: IO[str]) -> str:
+    """Read exiftool output up to the {ready} marker that ends each command."""
+    lines = []
+    for line in stream:
+        if line.rstrip() == READY:
+            return "".join(lines)
+        lines.append(line)
+    raise RuntimeError("exiftool exited unexpectedly")
+
+
+def add_comment(exiftool: subprocess.Popen, path: Path, comment: str) -> bool:
+    """Add comment to media file using the persistent exiftool process."""
     try:
         # -Description works across JPEG, HEIC, MOV, MP4, PNG
         # -UserComment as fallback for EXIF-only readers
-        result = subprocess.run(
-            [
-                "exiftool",
-                "-overwrite_original",
-                f"-Description={comment}",
-                f"-UserComment={comment}",
-                str(path),
-            ],
-            capture_output=True,
-            text=True,
-        )
+        # -echo4 marks the end of this command's stderr (stdout gets {ready})
+        args = [
+            "-overwrite_original",
+            f"-Description={comment}",
+            f"-UserComment={comment}",
+            str(path),
+            "-echo4",
+            READY,
+            "-execute",
+        ]
+        exiftool.stdin.write("\n".join(args) + "\n")
+        exiftool.stdin.flush()
+        stdout = read_until_ready(exiftool.stdout)
+        stderr = read_until_ready(exiftool.stderr)
         # Check for actual failure (not just warnings)
-        if result.returncode != 0:
-            print(f"  Error: {result.stderr.strip()}")
+        if "Error" in stderr:
+            print(f"  Error: {stderr.strip()}")
             return False
-        if "0 image files updated" in result.stdout:
+        if "0 image files updated" in stdout:
             print(f"  Warning: no tags written")
             return False
         return True
+    except RuntimeError as e:
+        # Output hit EOF, so exiftool is exiting; reap it so poll() sees it
+        exiftool.wait()
+        print(f"  Error: {e}")
+        return False
     except Exception as e:
         print(f"  Error: {e}")
         return False
 
 
+def add_comment_batch(paths: list[Path], comment: str) -> set[Path]:
+    """Add comment to many files in a single exiftool run. Returns the failures."""
+    args = [
+        "-overwrite_original",
+        f"-Description={comment}",
+        f"-UserComment={comment}",
+        *(str(p) for p in paths),
+    ]
+    with tempfile.NamedTemporaryFile("w", suffix=".args", delete=False) as argfile:
+        argfile.write("\n".join(args) + "\n")
+    try:
+        result = subprocess.run(
+            ["exiftool", "-@", argfile.name], capture_output=True, text=True
+        )
+    finally:
+        os.unlink(argfile.name)
+
+    # Per-file errors look like "Error: <reason> - <path>". Names often contain
+    # " - " themselves, so match against the known paths rather than splitting,
+    # preferring the longest match in case one path is a suffix of another.
+    failed = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("Error"):
+            continue
+        matches = [p for p in paths if line.endswith(f" - {p}")]
+        if matches:
+            failed.add(max(matches, key=lambda p: len(str(p))))
+    if result.returncode != 0 and not failed:
+        print(f"  Error: {result.stderr.strip()}")
+        return set(paths)
+    return failed
+
+
 @app.command()
 def main(
     directory: Path = typer.Argument(..., help="Directory containing media files"),
@@ -82,18 +157,17 @@ def main(
     excluded = set()
     if exclude:
         excluded = {f".{e.lower().lstrip('.')}" for e in exclude.split(",")}
+    extensions = SUPPORTED_EXTENSIONS - excluded
 
     # Find supported media files (sorted for deterministic order)
-    media_files = sorted(
-        [
-            f
-            for f in directory.iterdir()
-            if f.is_file()
-            and f.suffix.lower() in SUPPORTED_EXTENSIONS
-            and f.suffix.lower() not in excluded
-        ],
-        key=lambda f: f.name,
-    )
+    with os.scandir(directory) as it:
+        media_files = [
+            Path(e.path)
+            for e in it
+            if e.is_file(follow_symlinks=False)
+            and os.path.splitext(e.name)[1].lower() in extensions
+        ]
+    media_files.sort(key=lambda f: f.name)
 
     if not media_files:
         print(f"No supported files found. Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
@@ -104,17 +178,34 @@ def main(
     print(f"{'DRY RUN - ' if dry_run else ''}Processing {len(media_files)} files\n")
 
     success = 0
-    for f in media_files:
-        print(f"Processing: {f.name}")
-        if dry_run:
-            print(f"  Would add comment: '{comment}'")
-            success += 1
-        else:
-            if add_comment(f, comment):
+    exiftool = None if dry_run else start_exiftool()
+    batch_failed: set[Path] | None = None
+    try:
+        for i, f in enumerate(media_files):
+            print(f"Processing: {f.name}")
+            if dry_run:
+                print(f"  Would add comment: '{comment}'")
+                success += 1
+                continue
+
+            # If the persistent exiftool dies, finish the rest in one batch run
+            if batch_failed is None and exiftool.poll() is not None:
+                print("  exiftool exited, processing remaining files in one batch")
+                batch_failed = add_comment_batch(media_files[i:], comment)
+
+            if batch_failed is not None:
+                ok = f not in batch_failed
+            else:
+                ok = add_comment(exiftool, f, comment)
+
+            if ok:
                 print(f"  Added comment: '{comment}'")
                 success += 1
             else:
                 print(f"  Failed")
+    finally:
+        if exiftool:
+            stop_exiftool(exiftool)
 
     print(f"\nDone. Modified {success}/{len(media_files)} files.")
 
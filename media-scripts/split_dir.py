@@ -5,14 +5,20 @@
 """
 Split files from a directory into numbered subdirectories (1/, 2/, 3/, etc.).
 
-Uses first-fit-decreasing bin packing for efficient distribution.
+Uses best-fit-decreasing bin packing for efficient distribution.
 Files larger than the limit get their own directory.
+With --streaming, files are packed as they are scanned and each directory
+is filled as soon as it is nearly full.
 """
 
+import bisect
 import errno
+import os
 import re
 import shutil
 import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import typer
@@ -30,11 +36,16 @@ SIZE_UNITS = {
     "TB": 1024**4,
 }
 
+# Streaming mode moves a directory once it is this full
+FULL_RATIO = 0.95
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+SIZE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*(B|KB|MB|GB|TB)?$", re.IGNORECASE)
+
 
 def parse_size(size_str: str) -> int:
     """Parse a human-readable size string (e.g., '8GB', '500MB') into bytes."""
-    pattern = re.compile(r"^(\d+(?:\.\d+)?)\s*(B|KB|MB|GB|TB)?$", re.IGNORECASE)
-    match = pattern.match(size_str.strip())
+    match = SIZE_PATTERN.match(size_str.strip())
 
     if not match:
         raise typer.BadParameter(
@@ -58,16 +69,13 @@ def format_size(bytes_val: int) -> str:
 
 def find_max_numbered_dir(source_dir: Path) -> int:
     """Find the maximum existing numbered subdirectory (1/, 2/, etc.)."""
-    pattern = re.compile(r"^\d+$")
     max_num = 0
 
-    for entry in source_dir.iterdir():
-        if entry.is_dir() and pattern.match(entry.name):
-            try:
-                num = int(entry.name)
-                max_num = max(max_num, num)
-            except ValueError:
-                continue
+    with os.scandir(source_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.isascii() and name.isdigit() and entry.is_dir():
+                max_num = max(max_num, int(name))
 
     return max_num
 
@@ -85,12 +93,183 @@ def move_file(src: Path, dest: Path) -> None:
             raise
 
     shutil.copy2(src, dest)
+    src.unlink()
 
-    if src.stat().st_size != dest.stat().st_size:
-        dest.unlink()
-        raise RuntimeError(f"copy verification failed: size mismatch for {src}")
 
-    src.unlink()
+def scan_files(directory: Path) -> Iterator[tuple[str, int]]:
+    """Yield (name, size) for each regular file directly inside directory."""
+    # Scan with bytes so subdirectory names are never decoded; kept files are
+    with os.scandir(os.fsencode(directory)) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                size = entry.stat(follow_symlinks=False).st_size
+                yield os.fsdecode(entry.name), size
+
+
+def place_file(
+    name: str,
+    size: int,
+    max_size: int,
+    batches: list[list[tuple[str, int]]],
+    batch_sizes: list[int],
+    open_batches: list[tuple[int, int]],
+) -> int:
+    """Put a file in the tightest batch that still fits it, returning its index.
+
+    open_batches holds (remaining capacity, batch index) for batches that can
+    still take files. Files larger than max_size get a batch of their own.
+    """
+    if size > max_size:
+        print(
+            f"Warning: {name} exceeds {format_size(max_size)} ({format_size(size)}), placing in its own directory"
+        )
+        batches.append([(name, size)])
+        batch_sizes.append(size)
+        return len(batches) - 1
+
+    pos = bisect.bisect_left(open_batches, (size, -1))
+    if pos < len(open_batches):
+        remaining, i = open_batches.pop(pos)
+        batches[i].append((name, size))
+        batch_sizes[i] += size
+    else:
+        remaining, i = max_size, len(batches)
+        batches.append([(name, size)])
+        batch_sizes.append(size)
+
+    if remaining - size > 0:
+        bisect.insort(open_batches, (remaining - size, i))
+    return i
+
+
+def move_batch(
+    directory: Path, dir_name: str, batch: list[tuple[str, int]]
+) -> tuple[list[tuple[Path, Path]], str | None]:
+    """Move a batch into its numbered subdirectory.
+
+    Returns the (source, destination) pairs moved and, if something failed,
+    what failed.
+    """
+    dir_path = directory / dir_name
+    moved: list[tuple[Path, Path]] = []
+
+    try:
+        dir_path.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        return moved, f"creating {dir_path}\nError: {e}"
+
+    for name, _ in batch:
+        src, dest = directory / name, dir_path / name
+        try:
+            move_file(src, dest)
+        except Exception as e:
+            return moved, f"{src} -> {dest}\nError: {e}"
+        moved.append((src, dest))
+
+    return moved, None
+
+
+def split_streaming(
+    directory: Path, max_size: int, start_num: int, dry_run: bool
+) -> None:
+    """Pack files with online best-fit while scanning, moving batches as they fill.
+
+    Moves run while the scan is still reading the directory, and POSIX leaves
+    it unspecified whether readdir still returns every entry when others are
+    removed meanwhile. So once the scan ends and its moves have finished, the
+    directory is listed again, with nothing changing underneath, to pick up
+    any file the first pass missed.
+    """
+    batches: list[list[tuple[str, int]]] = []
+    batch_sizes: list[int] = []
+    open_batches: list[tuple[int, int]] = []
+    placed: set[str] = set()
+    pending: dict[Future[tuple[list[tuple[Path, Path]], str | None]], str] = {}
+    completed = 0
+    failure: str | None = None
+
+    def report(futures: Iterable[Future]) -> None:
+        nonlocal completed, failure
+        for future in futures:
+            dir_name = pending.pop(future)
+            if future.cancelled():
+                continue
+            moved, error = future.result()
+            print(f"\nDirectory {dir_name}:")
+            for src, dest in moved:
+                print(f"  Moved: {src} -> {dest}")
+            completed += len(moved)
+            if error and failure is None:
+                failure = error
+
+    def close_batch(pool: ThreadPoolExecutor, i: int) -> None:
+        dir_name = str(start_num + i + 1)
+        if dry_run:
+            print(
+                f"Directory {dir_name}: {len(batches[i])} files ({format_size(batch_sizes[i])})"
+            )
+            for name, _ in batches[i]:
+                print(f"  {name}")
+            return
+
+        future = pool.submit(move_batch, directory, dir_name, batches[i])
+        pending[future] = dir_name
+        report([f for f in pending if f.done()])
+
+    def place(pool: ThreadPoolExecutor, name: str, size: int) -> None:
+        placed.add(name)
+        i = place_file(name, size, max_size, batches, batch_sizes, open_batches)
+        if batch_sizes[i] >= max_size * FULL_RATIO:
+            entry = (max_size - batch_sizes[i], i)
+            pos = bisect.bisect_left(open_batches, entry)
+            if pos < len(open_batches) and open_batches[pos] == entry:
+                del open_batches[pos]
+            close_batch(pool, i)
+
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        for name, size in scan_files(directory):
+            place(pool, name, size)
+            if failure:
+                break
+
+        if not failure and not dry_run:
+            report(as_completed(list(pending)))
+        if not failure and not dry_run:
+            leftovers = [
+                (name, size)
+                for name, size in scan_files(directory)
+                if name not in placed
+            ]
+            for name, size in leftovers:
+                place(pool, name, size)
+                if failure:
+                    break
+
+        if not failure:
+            for _, i in sorted(open_batches, key=lambda b: b[1]):
+                close_batch(pool, i)
+            report(as_completed(list(pending)))
+    finally:
+        # On failure or interrupt, drop queued batches and report what finished
+        pool.shutdown(cancel_futures=True)
+        report(list(pending))
+
+    if not placed:
+        print("No files found in directory")
+        raise typer.Exit(0)
+
+    if dry_run:
+        print(f"\n{len(placed)} files would be moved into {len(batches)} directories")
+        raise typer.Exit(0)
+
+    if failure:
+        print(f"\nFAILED: {failure}", file=sys.stderr)
+        print(f"\nStopping. {completed}/{len(placed)} files moved.", file=sys.stderr)
+        print("Re-run to continue with remaining files.", file=sys.stderr)
+        raise typer.Exit(1)
+
+    print(f"\nDone! {completed} files moved into {len(batches)} directories.")
 
 
 @app.command()
@@ -105,12 +284,19 @@ def main(
     dry_run: bool = typer.Option(
         False, "--dry-run", "-n", help="Preview changes without moving files"
     ),
+    streaming: bool = typer.Option(
+        False,
+        "--streaming",
+        help="Pack and move files while scanning (starts sooner, packs less tightly)",
+    ),
 ) -> None:
     """
     Split files from a directory into numbered subdirectories (1/, 2/, 3/, etc.).
 
-    Uses first-fit-decreasing bin packing for efficient distribution of files.
+    Uses best-fit-decreasing bin packing for efficient distribution of files.
     Files larger than the size limit are placed in their own directory.
+    With --streaming, files are packed in scan order and each directory is
+    moved once it is nearly full, overlapping the scan with the moves.
     """
     if not directory.exists():
         print(f"Error: directory does not exist: {directory}", file=sys.stderr)
@@ -134,10 +320,11 @@ def main(
             f"Found existing numbered directories up to {start_num}/, starting from {start_num + 1}/\n"
         )
 
-    files: list[tuple[str, int]] = []
-    for entry in directory.iterdir():
-        if entry.is_file():
-            files.append((entry.name, entry.stat().st_size))
+    if streaming:
+        split_streaming(directory, max_size, start_num, dry_run)
+        return
+
+    files = list(scan_files(directory))
 
     if not files:
         print("No files found in directory")
@@ -147,27 +334,10 @@ def main(
 
     batches: list[list[tuple[str, int]]] = []
     batch_sizes: list[int] = []
+    open_batches: list[tuple[int, int]] = []
 
     for name, size in files:
-        if size > max_size:
-            print(
-                f"Warning: {name} exceeds {format_size(max_size)} ({format_size(size)}), placing in its own directory"
-            )
-            batches.append([(name, size)])
-            batch_sizes.append(size)
-            continue
-
-        placed = False
-        for i, batch_size in enumerate(batch_sizes):
-            if batch_size + size <= max_size:
-                batches[i].append((name, size))
-                batch_sizes[i] += size
-                placed = True
-                break
-
-        if not placed:
-            batches.append([(name, size)])
-            batch_sizes.append(size)
+        place_file(name, size, max_size, batches, batch_sizes, open_batches)
 
     print(
         f"Splitting {len(files)} files into {len(batches)} directories (max {format_size(max_size)} each)\n"